@@ -2,23 +2,31 @@
 
 import abc
 import json
+import operator
 import csv
-from typing import Dict
+from typing import Any, Iterable, List, Tuple
 
 
 FIELDNAMES = ['id', 'title', 'risk_rating', 'cvss_v3_vector', 'short_description']
+# Output files are written through a large buffer to issue few big writes instead of one per row.
+OUTPUT_BUFFER_SIZE = 1 << 20
+JSON_SEPARATORS = (',', ':')
+
+
+# Projects a vulnerability row to a tuple of serializable values following the order of `FIELDNAMES`.
+_to_tuple = operator.attrgetter('id', 'title', 'risk_rating.value', 'cvss_v3_vector', 'short_description')
 
 
 class VulnzDumper(abc.ABC):
     """Dumper Base class: All dumpers should inherit from this class to access the dump method."""
 
-    def __init__(self, output_path: str, data: Dict[str, Dict]) -> None:
+    def __init__(self, output_path: str, data: Iterable[Any]) -> None:
         """Constructs all the necessary attributes for the object.
 
         Args:
             output_path: path to the output file.
-            data: dictionary, with vulnerability id as a key,
-                  and a dictionary of the vulnerability information as values.
+            data: iterable of vulnerability rows, exposing the `FIELDNAMES` as attributes. The iterable is consumed
+                  only once, while dumping.
 
         Returns:
             None
@@ -27,40 +35,78 @@ class VulnzDumper(abc.ABC):
         self.data = data
 
     @abc.abstractmethod
-    def dump(self) -> None:
-        """Dump the vulnerabilities in the right format."""
+    def dump(self) -> int:
+        """Dump the vulnerabilities in the right format.
+
+        Returns:
+            Number of dumped vulnerabilities.
+        """
         raise NotImplementedError('Missing implementation')
 
 
 class VulnzJsonDumper(VulnzDumper):
     """Vulnerability dumper to json."""
 
-    def dump(self) -> None:
-        """Dump vulnerabilities to json file.
+    def dump(self) -> int:
+        """Dump vulnerabilities to json file. Vulnerabilities are written one at a time to a json object with the
+        vulnerability id as a key, and a dictionary of the vulnerability information as value.
 
         Raises:
             FileNotFoundError: in case the path or file name are invalid.
+
+        Returns:
+            Number of dumped vulnerabilities.
         """
         if not self.output_path.endswith('.json'):
             self.output_path+= '.json'
-        with open(self.output_path , 'w', encoding='utf-8') as outfile:
-            json.dump(self.data, outfile)
+        count = 0
+        with open(self.output_path , 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as outfile:
+            outfile.write('{')
+            for vulnerability in self.data:
+                if count > 0:
+                    outfile.write(',')
+                vuln_id, title, risk_rating, cvss_v3_vector, short_description = _to_tuple(vulnerability)
+                vuln = {'title': title, 'risk_rating': risk_rating, 'cvss_v3_vector': cvss_v3_vector,
+                        'short_description': short_description}
+                outfile.write(f'{json.dumps(str(vuln_id))}:{json.dumps(vuln, separators=JSON_SEPARATORS)}')
+                count += 1
+            outfile.write('}')
+        return count
 
 
 class VulnzCsvDumper(VulnzDumper):
     """Vulnerability dumper to csv."""
 
-    def dump(self) -> None:
+    def dump(self) -> int:
         """Dump vulnerabilities to csv file.
 
         Raises:
             FileNotFoundError: in case the path or file name are invalid.
+
+        Returns:
+            Number of dumped vulnerabilities.
+        """
+        return self.dump_rows((_to_tuple(vulnerability) for vulnerability in self.data), FIELDNAMES)
+
+    def dump_rows(self, rows: Iterable[Tuple], fieldnames: List[str]) -> int:
+        """Dump already projected rows to csv file, preceded by a header row.
+
+        Args:
+            rows: iterable of tuples, with values following the order of the fieldnames.
+            fieldnames: names of the csv columns.
+
+        Raises:
+            FileNotFoundError: in case the path or file name are invalid.
+
+        Returns:
+            Number of dumped rows.
         """
         if not self.output_path.endswith('.csv'):
             self.output_path+= '.csv'
-        with open(self.output_path , 'w', encoding='utf-8') as outfile:
-            csv_writer = csv.DictWriter(outfile, fieldnames = FIELDNAMES)
-            csv_writer.writeheader()
-            for key in self.data:
-                csv_writer.writerow({field: self.data[key].get(field) or key for field in FIELDNAMES})
-        
\ No newline at end of file
+        count = 0
+        with open(self.output_path , 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as outfile:
+            csv_writer = csv.writer(outfile)
+            csv_writer.writerow(fieldnames)
+            for count, row in enumerate(rows, start=1):
+                csv_writer.writerow(row)
+        return count
@@ -2,7 +2,7 @@
 import logging
 import click
 
-from sqlalchemy import case
+import sqlalchemy
 
 from ostorlab.cli import console as cli_console
 from ostorlab.cli.vulnz import vulnz
@@ -26,28 +26,26 @@ def dump(scan_id: int, output: str, output_format: str) -> None:
     session = database.session
     severities = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2, 'POTENTIALLY': 3,
                   'HARDENING': 4, 'SECURE': 5, 'IMPORTANT': 6, 'INFO': 7}
-    severity_sort_logic = case(value=models.Vulnerability.risk_rating, whens=severities).label('severity')
-    vulnerabilities = session.query(models.Vulnerability).filter_by(scan_id=scan_id).\
-        order_by(severity_sort_logic).all()
-
-    vulnz_list = {}
-    for vulnerability in vulnerabilities:
-        vuln = {
-            'risk_rating': vulnerability.risk_rating.value,
-            'cvss_v3_vector': vulnerability.cvss_v3_vector,
-            'title': vulnerability.title,
-            'short_description': vulnerability.short_description
-        }
-        vulnz_list[str(vulnerability.id)] = vuln
+    severity_sort_logic = sqlalchemy.case(value=models.Vulnerability.risk_rating, whens=severities).label('severity')
+    statement = sqlalchemy.select(models.Vulnerability.id,
+                                  models.Vulnerability.risk_rating,
+                                  models.Vulnerability.cvss_v3_vector,
+                                  models.Vulnerability.title,
+                                  models.Vulnerability.short_description).\
+        where(models.Vulnerability.scan_id == scan_id).\
+        order_by(severity_sort_logic).\
+        execution_options(yield_per=1000)
+    vulnerabilities = session.execute(statement)
+
     if output_format=='json':
-        dumper = dumpers.VulnzJsonDumper(output, vulnz_list)
+        dumper = dumpers.VulnzJsonDumper(output, vulnerabilities)
     elif output_format=='csv':
-        dumper = dumpers.VulnzCsvDumper(output, vulnz_list)
+        dumper = dumpers.VulnzCsvDumper(output, vulnerabilities)
 
     try:
-        dumper.dump()
+        count = dumper.dump()
     except FileNotFoundError as e:
         console.error(f'No such file or directory: {output}')
         raise click.exceptions.Exit(2) from e
 
-    console.success(f'{len(vulnerabilities)} Vulnerabilities saved to  : {output}')
+    console.success(f'{count} Vulnerabilities saved to  : {output}')
@@ -37,6 +37,8 @@ class LogStream:
     def __init__(self):
         self._threads = []
         self._color_map = {}
+        # Agents may be started and streamed from multiple threads.
+        self._lock = threading.Lock()
 
     def stream(self, service: docker.models.services.Service) -> None:
         """Stream logs of a service without blocking.
@@ -46,10 +48,12 @@ class LogStream:
         Args:
             service: Docker service.
         """
-        color = self._select_color(service)
+        with self._lock:
+            color = self._select_color(service)
         logs = service.logs(details=False, follow=True, stdout=True, stderr=True)
         t = threading.Thread(target=_stream_log, args=(logs, service.name, color), daemon=False)
-        self._threads.append(t)
+        with self._lock:
+            self._threads.append(t)
         t.start()
 
     def _select_color(self, service):
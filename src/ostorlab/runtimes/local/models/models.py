@@ -3,8 +3,11 @@
 import datetime
 import enum
 import logging
+import threading
+from typing import Dict, Set
 
 import sqlalchemy
+from sqlalchemy import engine
 from sqlalchemy import orm
 from sqlalchemy.ext import declarative
 
@@ -41,33 +44,53 @@ class ScanProgress(enum.Enum):
 
 
 class Database:
-    """Handles all Database instantiation and calls."""
+    """Handles all Database instantiation and calls.
+
+    Engines, session factories and created tables are shared between all the instances using the same database URL,
+    to avoid paying the engine, connection pool and tables creation costs on every instantiation.
+    """
+
+    _engines: Dict[str, engine.Engine] = {}
+    _session_makers: Dict[str, orm.sessionmaker] = {}
+    _created_tables: Set[str] = set()
+    _lock = threading.Lock()
 
     def __init__(self):
-        """Constructs the database engine."""
-        self._db_engine = sqlalchemy.create_engine(ENGINE_URL)
+        """Constructs the database engine, or reuses the one already constructed for the same database URL."""
+        self._engine_url = ENGINE_URL
+        with Database._lock:
+            if self._engine_url not in Database._engines:
+                db_engine = sqlalchemy.create_engine(self._engine_url)
+                Database._engines[self._engine_url] = db_engine
+                Database._session_makers[self._engine_url] = orm.sessionmaker(bind=db_engine, expire_on_commit=False)
+        self._db_engine = Database._engines[self._engine_url]
         self._db_session = None
 
     @property
     def session(self):
         """Session singleton to run queries on the db engine"""
         if self._db_session is None:
-            session_maker = orm.sessionmaker(expire_on_commit=False)
-            session_maker.configure(bind=self._db_engine)
-            self._db_session = session_maker()
-            return self._db_session
-        else:
-            return self._db_session
+            self._db_session = Database._session_makers[self._engine_url]()
+        return self._db_session
 
     def create_db_tables(self):
-        """Create the database tables."""
+        """Create the database tables, only once for each database URL."""
+        if self._engine_url in Database._created_tables:
+            return
         with self._db_engine.begin() as conn:
             metadata.create_all(conn)
+            # create_all skips existing tables, indexes added since they were created by a previous version are
+            # created separately.
+            for table in metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
             logger.info('Tables created')
+        Database._created_tables.add(self._engine_url)
 
     def drop_db_tables(self):
         """Drop the database tables."""
         metadata.drop_all(self._db_engine)
+        Database._created_tables.discard(self._engine_url)
         logger.info('Tables dropped')
 
 
@@ -99,6 +122,8 @@ class Scan(Base):
 class Vulnerability(Base):
     """The Vulnerability model"""
     __tablename__ = 'vulnerability'
+    # Vulnerabilities are queried by scan and ordered by title.
+    __table_args__ = (sqlalchemy.Index('ix_vuln_scan_title', 'scan_id', 'title'),)
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     technical_detail = sqlalchemy.Column(sqlalchemy.Text)
     risk_rating = sqlalchemy.Column(sqlalchemy.Enum(RiskRating))
@@ -5,13 +5,17 @@ a local RabbitMQ.
 """
 import logging
 import socket
+import time
+from concurrent import futures
 from typing import List
 from typing import Optional
 
 import click
 import docker
 import requests
+import sqlalchemy
 import tenacity
+from docker.models import resource as docker_models_resource
 from docker.models import services as docker_models_services
 
 from ostorlab import exceptions
@@ -27,6 +31,17 @@ from ostorlab.runtimes.local.models import models
 from ostorlab.runtimes.local.services import mq
 
 NETWORK_PREFIX = 'ostorlab_local_network'
+# Maximum number of concurrent docker API calls used to remove the components of a scan. The calls share the docker
+# client connection pool, more workers than its size do not add throughput.
+REMOVE_MAX_WORKERS = docker.constants.DEFAULT_MAX_POOL_SIZE
+# Maximum number of agents started concurrently, bounded by the docker client connection pool size.
+START_AGENTS_MAX_WORKERS = docker.constants.DEFAULT_MAX_POOL_SIZE
+# Timeout in seconds of an agent status request, a hung agent must not block the readiness check.
+AGENT_STATUS_TIMEOUT = 2
+# Maximum duration in seconds of the event based wait for agents, before falling back to polling their tasks.
+AGENTS_READY_EVENTS_TIMEOUT = 60
+# States of a task that will not be running anymore.
+TERMINAL_TASK_STATES = ('failed', 'rejected', 'shutdown')
 
 logger = logging.getLogger(__name__)
 console = cli_console.Console()
@@ -70,9 +85,11 @@ def _is_agent_status_ok(ip: str) -> bool:
     """
     status_ok = False
     try:
-        status_ok = requests.get(f'http://{ip}:5000/status').text == 'OK'
+        status_ok = requests.get(f'http://{ip}:5000/status', timeout=AGENT_STATUS_TIMEOUT).text == 'OK'
     except requests.exceptions.ConnectionError:
         logger.error('unable to connect to %s', ip)
+    except requests.exceptions.Timeout:
+        logger.error('status request to %s timed out', ip)
     return status_ok
 
 
@@ -95,6 +112,40 @@ def _get_task_ips(service: docker_models_services.Service) -> List[str]:
         return []
 
 
+def _remove_component(component: docker_models_resource.Model) -> bool:
+    """Removes a docker component (service, network or config) on a best-effort basis.
+
+    Args:
+        component: Docker component to remove.
+
+    Returns:
+        True if the component was removed, false otherwise.
+    """
+    logger.debug('removing %s %s', type(component).__name__.lower(), component.id)
+    try:
+        component.remove()
+        return True
+    except docker.errors.APIError as e:
+        logger.error('unable to remove %s: %s', component.id, e)
+        return False
+
+
+def _remove_components(components: List[docker_models_resource.Model]) -> List[docker_models_resource.Model]:
+    """Removes docker components concurrently, as each removal is a blocking call to the docker daemon.
+
+    Args:
+        components: Docker components to remove.
+
+    Returns:
+        List of the removed components.
+    """
+    if not components:
+        return []
+    with futures.ThreadPoolExecutor(max_workers=min(REMOVE_MAX_WORKERS, len(components))) as executor:
+        removed = executor.map(_remove_component, components)
+        return [component for component, is_removed in zip(components, removed) if is_removed]
+
+
 def _is_service_type_run(service: docker_models_services.Service) -> bool:
     """Checks if the service should run once or should be continuously running.
 
@@ -225,43 +276,19 @@ class LocalRuntime(runtime.Runtime):
             scan_id: The id of the scan to stop.
         """
 
-        stopped_services = []
-        stopped_network = []
-        stopped_configs = []
-        client = docker.from_env()
-        services = client.services.list()
-        for service in services:
-            service_labels = service.attrs['Spec']['Labels']
-            logger.debug('comparing %s and %s', service_labels.get('ostorlab.universe'), scan_id)
-            if service_labels.get('ostorlab.universe') == scan_id:
-                stopped_services.append(service)
-                service.remove()
-
-        networks = client.networks.list()
-        for network in networks:
-            network_labels = network.attrs['Labels']
-            if network_labels is not None and network_labels.get('ostorlab.universe') == scan_id:
-                logger.debug('removing network %s', network_labels)
-                stopped_network.append(network)
-                network.remove()
-
-        configs = client.configs.list()
-        for config in configs:
-            config_labels = config.attrs['Spec']['Labels']
-            if config_labels.get('ostorlab.universe') == scan_id:
-                logger.debug('removing config %s', config_labels)
-                stopped_configs.append(config)
-                config.remove()
+        universe_filter = {'label': f'ostorlab.universe={scan_id}'}
+        # Services are removed first as networks can not be removed while used by services.
+        stopped_services = _remove_components(self._docker_client.services.list(filters=universe_filter))
+        stopped_network = _remove_components(self._docker_client.networks.list(filters=universe_filter))
+        stopped_configs = _remove_components(self._docker_client.configs.list(filters=universe_filter))
 
         if stopped_services or stopped_network or stopped_configs:
             console.success('All scan components stopped.')
 
         database = models.Database()
         session = database.session
-        scan = session.query(models.Scan).get(int(scan_id))
-        if scan:
-            scan.progress = 'STOPPED'
-            session.commit()
+        session.execute(sqlalchemy.update(models.Scan).where(models.Scan.id == int(scan_id)).values(progress='STOPPED'))
+        session.commit()
         console.success('Scan stopped successfully.')
 
     def _create_scan_db(self, title: str, asset: str):
@@ -273,13 +300,16 @@ class LocalRuntime(runtime.Runtime):
         """Update scan status to in progress"""
         database = models.Database()
         session = database.session
-        scan = session.query(models.Scan).get(self._scan_db.id)
-        scan.progress = progress
+        session.execute(sqlalchemy.update(models.Scan).where(models.Scan.id == self._scan_db.id).
+                        values(progress=progress))
         session.commit()
 
     def _create_network(self):
         """Creates a docker swarm network where all services and agents can communicates."""
-        if any(network.name == self.network for network in self._docker_client.networks.list()):
+        # Docker matches network names partially, the exact name is checked on the label filtered networks.
+        networks = self._docker_client.networks.list(names=[self.network],
+                                                     filters={'label': f'ostorlab.universe={self.name}'})
+        if any(network.name == self.network for network in networks):
             logger.warning('network already exists.')
         else:
             logger.info('creating private network %s', self.network)
@@ -312,9 +342,18 @@ class LocalRuntime(runtime.Runtime):
         return self._are_agents_ready()
 
     def _start_agents(self, agent_group_definition: definitions.AgentGroupDefinition):
-        """Starts all the agents as list in the agent run definition."""
-        for agent in agent_group_definition.agents:
-            self._start_agent(agent, extra_configs=[])
+        """Starts all the agents as list in the agent run definition. All the agent images are checked first, so no
+        agent is started if one of them is not installed. Agents are then started concurrently to overlap the docker
+        API calls, the first error raised while starting an agent is re-raised.
+        """
+        agents = agent_group_definition.agents
+        for agent in agents:
+            if _has_container_image(agent) is False:
+                raise AgentNotInstalled(agent.key)
+        if not agents:
+            return
+        with futures.ThreadPoolExecutor(max_workers=min(START_AGENTS_MAX_WORKERS, len(agents))) as executor:
+            list(executor.map(lambda agent: self._start_agent(agent, extra_configs=[]), agents))
 
     def _start_pre_agents(self):
         """Starting pre-agents that must exist before other agents. This applies to all persistence
@@ -344,27 +383,30 @@ class LocalRuntime(runtime.Runtime):
             self._log_streamer.stream(agent_service)
 
         if agent.replicas > 1:
-            # Ensure the agent service had to
-            # TODO(alaeddine): Check if sleep if really needed and if it is, implement a parallel way to start agents
-            #  and scale them.
+            # TODO(alaeddine): Check if a sleep is really needed before scaling. Agents are started concurrently by
+            #  `_start_agents`, so it would only delay this agent.
             # time.sleep(10)
             self._scale_service(agent_service, agent.replicas)
 
-    @tenacity.retry(stop=tenacity.stop_after_attempt(20),
-                    wait=tenacity.wait_exponential(multiplier=1, max=12),
-                    # return last value and don't raise RetryError exception.
-                    retry_error_callback=lambda lv: lv.outcome.result(),
-                    retry=tenacity.retry_if_result(lambda v: v is False))
-    def _is_service_healthy(self, service: docker_models_services.Service, replicas=None) -> bool:
-        """Checks if a docker service is healthy by checking all tasks status."""
+    def _is_service_running(self, service: docker_models_services.Service, replicas=None) -> bool:
+        """Checks once if all the tasks of a docker service are running."""
         logger.debug('checking Spec service %s', service.name)
         try:
             if not replicas:
                 replicas = service.attrs['Spec']['Mode']['Replicated']['Replicas']
-            return replicas == len([task for task in service.tasks() if task['Status']['State'] == 'running'])
+            # Tasks of previous runs are filtered by the daemon, desired running tasks may still be starting.
+            tasks = service.tasks(filters={'desired-state': 'running'})
+            return replicas == len([task for task in tasks if task['Status']['State'] == 'running'])
         except docker.errors.NotFound:
             return False
 
+    def _has_service_failed(self, service: docker_models_services.Service) -> bool:
+        """Checks if a task of a docker service has reached a terminal state."""
+        try:
+            return any(task['Status']['State'] in TERMINAL_TASK_STATES for task in service.tasks())
+        except docker.errors.NotFound:
+            return True
+
     def _list_agent_services(self):
         """List the services of type agents. All agent service must start with agent_."""
         services = self._docker_client.services.list(filters={'label': f'ostorlab.universe={self.name}'})
@@ -386,15 +428,22 @@ class LocalRuntime(runtime.Runtime):
 
     def _inject_asset(self, asset: base_asset.Asset):
         """Injects the scan target assets."""
-        asset_config = self._docker_client.configs.create(name=f'asset_{self.name}',
-                                                          labels={'ostorlab.universe': self.name},
-                                                          data=asset.to_proto())
+        # Both configs are independent, they are created concurrently.
+        with futures.ThreadPoolExecutor(max_workers=2) as executor:
+            asset_future = executor.submit(self._docker_client.configs.create,
+                                           name=f'asset_{self.name}',
+                                           labels={'ostorlab.universe': self.name},
+                                           data=asset.to_proto())
+            selector_future = executor.submit(self._docker_client.configs.create,
+                                              name=f'asset_selector_{self.name}',
+                                              labels={'ostorlab.universe': self.name},
+                                              data=asset.selector)
+            asset_config = asset_future.result()
+            selector_config = selector_future.result()
+
         asset_config_reference = docker.types.ConfigReference(config_id=asset_config.id,
                                                               config_name=f'asset_{self.name}',
                                                               filename='/tmp/asset.binproto')
-        selector_config = self._docker_client.configs.create(name=f'asset_selector_{self.name}',
-                                                             labels={'ostorlab.universe': self.name},
-                                                             data=asset.selector)
         selector_config_reference = docker.types.ConfigReference(config_id=selector_config.id,
                                                                  config_name=f'asset_selector_{self.name}',
                                                                  filename='/tmp/asset_selector.txt')
@@ -406,9 +455,7 @@ class LocalRuntime(runtime.Runtime):
     def _scale_service(self, service: docker_models_services.Service, replicas: int) -> None:
         """Calling scale directly on the service causes an API error. This is a workaround that simulates refreshing
          the service object, then calling the scale API."""
-        for s in self._docker_client.services.list():
-            if s.name == service.name:
-                s.scale(replicas)
+        self._docker_client.services.get(service.id).scale(replicas)
 
     def list(self, page: int = 1, number_elements: int = 10) -> List[runtime.Scan]:
         """Lists scans managed by runtime.
@@ -427,7 +474,9 @@ class LocalRuntime(runtime.Runtime):
         database = models.Database()
         database.create_db_tables()
         session = database.session
-        for s in session.query(models.Scan):
+        scans_query = session.query(models.Scan.id, models.Scan.asset, models.Scan.created_time,
+                                    models.Scan.progress).order_by(models.Scan.id).yield_per(1000)
+        for s in scans_query:
             scans[s.id] = runtime.Scan(
                 id=s.id,
                 asset=s.asset,
@@ -436,14 +485,12 @@ class LocalRuntime(runtime.Runtime):
             )
 
         universe_ids = set()
-        client = docker.from_env()
-        services = client.services.list()
+        services = self._docker_client.services.list(filters={'label': 'ostorlab.universe'})
 
         for s in services:
             try:
-                service_labels = s.attrs['Spec']['Labels']
-                ostorlab_universe_id = service_labels.get('ostorlab.universe')
-                if 'ostorlab.universe' in service_labels.keys() and ostorlab_universe_id not in universe_ids:
+                ostorlab_universe_id = s.attrs['Spec']['Labels'].get('ostorlab.universe')
+                if ostorlab_universe_id and ostorlab_universe_id not in universe_ids:
                     universe_ids.add(ostorlab_universe_id)
                     if ostorlab_universe_id.isnumeric() and int(ostorlab_universe_id) not in scans:
                         console.warning(f'Scan {ostorlab_universe_id} has not traced in DB.')
@@ -452,26 +499,99 @@ class LocalRuntime(runtime.Runtime):
 
         return list(scans.values())
 
+    def _are_agents_ready(self, fail_fast=True) -> bool:
+        """Checks that all agents are ready and healthy while taking into account the run type of agent
+         (once vs long-running)."""
+        logger.info('listing services ...')
+        # The agent services do not change while waiting for them, only their tasks state does. They are listed once
+        # and only the health check is retried.
+        agent_services = [s for s in self._list_agent_services() if not _is_service_type_run(s)]
+        if self._wait_for_services_running(agent_services, timeout=AGENTS_READY_EVENTS_TIMEOUT, fail_fast=fail_fast):
+            return True
+        logger.info('agent services not running, falling back to polling')
+        return self._are_services_healthy(agent_services, fail_fast=fail_fast)
+
+    def _wait_for_services_running(self, agent_services: List[docker_models_services.Service], timeout: int,
+                                   fail_fast: bool = True) -> bool:
+        """Waits for the tasks of the services to be running using the docker events stream.
+
+        A service is checked once when the stream is opened and then only when one of its containers emits an event
+        (start, health status, healthcheck exec...), instead of polling the tasks of all the services.
+
+        Args:
+            agent_services: The long-running agent services to wait for.
+            timeout: Maximum duration in seconds of the wait.
+            fail_fast: Stop waiting as soon as a task of a service fails or one of its containers dies.
+
+        Returns:
+            True if all the services are running before the timeout, false otherwise.
+        """
+        if not agent_services:
+            return True
+        pending_services = {service.name: service for service in agent_services}
+        # The stream is opened before the first check to not miss the events of tasks starting in between.
+        events = self._docker_client.events(decode=True, until=int(time.time()) + timeout,
+                                            filters={'type': 'container'})
+        try:
+            for name, service in list(pending_services.items()):
+                if self._is_service_running(service):
+                    logger.info('agent service %s is healthy', name)
+                    del pending_services[name]
+                elif fail_fast and self._has_service_failed(service):
+                    logger.error('agent service %s has failed', name)
+                    return False
+            if not pending_services:
+                return True
+            for event in events:
+                name = event.get('Actor', {}).get('Attributes', {}).get('com.docker.swarm.service.name')
+                if name not in pending_services:
+                    continue
+                if fail_fast and event.get('Action') == 'die':
+                    logger.error('agent service %s container died', name)
+                    return False
+                if self._is_service_running(pending_services[name]):
+                    logger.info('agent service %s is healthy', name)
+                    del pending_services[name]
+                    if not pending_services:
+                        return True
+            return False
+        finally:
+            events.close()
+
     @tenacity.retry(stop=tenacity.stop_after_attempt(20),
                     wait=tenacity.wait_exponential(multiplier=1, max=20),
                     # return last value and don't raise RetryError exception.
                     retry_error_callback=lambda lv: lv.outcome.result(),
                     retry=tenacity.retry_if_result(lambda v: v is False))
-    def _are_agents_ready(self, fail_fast=True) -> bool:
-        """Checks that all agents are ready and healthy while taking into account the run type of agent
-         (once vs long-running)."""
-        logger.info('listing services ...')
-        agent_services = list(self._list_agent_services())
-        for service in agent_services:
-            logger.info('checking %s ...', service.name)
-            if not _is_service_type_run(service):
-                if self._is_service_healthy(service):
+    def _are_services_healthy(self, agent_services: List[docker_models_services.Service], fail_fast=True) -> bool:
+        """Checks that all the provided long-running agent services are healthy.
+
+        Each attempt checks every service once, without retrying per service, so that no probe outlives the attempt.
+        The services are checked concurrently, bounded by the docker client connection pool size.
+        """
+        if not agent_services:
+            return True
+
+        max_workers = min(docker.constants.DEFAULT_MAX_POOL_SIZE, len(agent_services))
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            health_futures = {}
+            for service in agent_services:
+                logger.info('checking %s ...', service.name)
+                health_futures[executor.submit(self._is_service_running, service)] = service
+            are_healthy = True
+            for future in futures.as_completed(health_futures):
+                service = health_futures[future]
+                if future.result():
                     logger.info('agent service %s is healthy', service.name)
                 else:
-                    logger.error('agent service %s is not healthy', service.name)
+                    logger.info('agent service %s is not healthy yet', service.name)
+                    are_healthy = False
                     if fail_fast:
-                        return False
-        return True
+                        # Checks not started yet are dropped, started ones are single API calls waited on exit.
+                        for pending_future in health_futures:
+                            pending_future.cancel()
+                        break
+            return are_healthy
 
     def install(self) -> None:
         """Installs the default agents.
@@ -95,3 +95,30 @@ def testVulnzDumpInOrderOfSeverity_whenOptionsAreValid_jsonOutputFileIsCreated(m
         assert result.exception is None
         assert 'Vulnerabilities saved' in result.output
         assert data[list(data)[0]]['risk_rating'] == 'Low' and data[list(data)[1]]['risk_rating'] == 'Hardening'
+
+
+def testVulnzDump_whenScanHasMultipleVulnerabilities_allVulnerabilitiesAreCountedAndDumped(mocker, tmpdir,
+                                                                                            db_engine_path):
+    """Test ostorlab vulnz dump command with multiple vulnerabilities.
+    Should write every vulnerability to the csv file and report their count.
+
+    tmpdir : pytest fixture for temporary paths & files.
+    """
+    runner = CliRunner()
+    mocker.patch.object(models, 'ENGINE_URL', db_engine_path)
+    models.Database().create_db_tables()
+    create_scan_db = models.Scan.create(title='test', asset='Android')
+    for i in range(3):
+        models.Vulnerability.create(title=f'MyVuln{i}', short_description='Xss', description='Javascript Vuln',
+                                    recommendation='Sanitize data', technical_detail='a=$input', risk_rating='LOW',
+                                    cvss_v3_vector='5:6:7', dna='121312', scan_id=create_scan_db.id)
+
+    output_file = pathlib.Path(tmpdir) / 'output.csv'
+    result = runner.invoke(rootcli.rootcli,
+                           ['vulnz', 'dump', '-s', str(create_scan_db.id), '-o', str(output_file), '-f', 'csv'])
+    with output_file.open('r', encoding='utf-8') as file:
+        data = [row for row in csv.reader(file) if row][1:]
+
+    assert result.exception is None
+    assert '3 Vulnerabilities saved' in result.output
+    assert sorted(row[1] for row in data) == ['MyVuln0', 'MyVuln1', 'MyVuln2']
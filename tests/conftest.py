@@ -6,6 +6,7 @@ import sys
 import pytest
 import docker
 
+from ostorlab.runtimes.local import runtime as local_runtime
 from ostorlab.runtimes.local.services import mq
 
 
@@ -116,3 +117,19 @@ def db_engine_path(tmpdir):
     else:
         path = f'sqlite:////{tmpdir}/ostorlab_db1.sqlite'
     return path
+
+
+@pytest.fixture(name='docker_client')
+def fixture_docker_client(mocker):
+    """Mocked docker client, used by the `local_runtime_instance` fixture."""
+    return mocker.MagicMock()
+
+
+@pytest.fixture()
+def local_runtime_instance(mocker, docker_client):
+    """Local runtime instance with its constructor bypassed and a mocked docker client."""
+    # pylint: disable=protected-access
+    mocker.patch('ostorlab.runtimes.local.LocalRuntime.__init__', return_value=None)
+    instance = local_runtime.LocalRuntime()
+    instance._docker_client = docker_client
+    return instance
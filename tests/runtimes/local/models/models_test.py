@@ -57,3 +57,32 @@ def testModelsScanStatus_whenDatabaseDoesNotExist_DatabaseAndScanCreated(mocker,
     assert models.Database().session.query(models.ScanStatus).all()[-1].key == 'status'
     assert models.Database().session.query(models.ScanStatus).all()[-1].value == 'in_progress'
     assert models.Database().session.query(models.ScanStatus).all()[-1].scan_id == create_scan_db.id
+
+
+def testDatabase_whenInstantiatedMultipleTimes_engineAndTablesAreCreatedOnce(mocker, db_engine_path):
+    """Test Database instances with the same database URL share the engine and create the tables once."""
+    mocker.patch.object(models, 'ENGINE_URL', db_engine_path)
+    create_engine = mocker.spy(models.sqlalchemy, 'create_engine')
+    create_all = mocker.spy(models.metadata, 'create_all')
+
+    models.Database().create_db_tables()
+    models.Database().create_db_tables()
+
+    assert create_engine.call_count == 1
+    assert create_all.call_count == 1
+    assert models.Database().session.query(models.Scan).count() == 0
+
+
+def testCreateDbTables_whenTablesExistWithoutIndex_indexIsCreated(mocker, db_engine_path):
+    """Test the vulnerability index is added to a database created before the index was defined."""
+    mocker.patch.object(models, 'ENGINE_URL', db_engine_path)
+    engine = models.sqlalchemy.create_engine(db_engine_path)
+    models.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.sqlalchemy.text('DROP INDEX ix_vuln_scan_title'))
+
+    models.Database().create_db_tables()
+
+    indexes = models.sqlalchemy.inspect(engine).get_indexes('vulnerability')
+    assert [index['column_names'] for index in indexes if index['name'] == 'ix_vuln_scan_title'] == [
+        ['scan_id', 'title']]
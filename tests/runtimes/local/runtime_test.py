@@ -2,6 +2,8 @@
 import docker
 import pytest
 import sys
+import tenacity
+import time
 import ostorlab
 from ostorlab.assets import android_apk
 from ostorlab.runtimes import definitions
@@ -60,19 +62,20 @@ def testRuntimeScanStop_whenScanIdIsValid_RemovesScanService(mocker, tmpdir):
     mocker.patch.object(models, 'ENGINE_URL', f'{path}')
     models.Database().create_db_tables()
     create_scan_db = models.Scan.create('test')
-    def docker_services():
-        """Method for mocking the services list response."""
+    def docker_services(filters):
+        """Method for mocking the services list response, filtered by the universe label."""
         scan = models.Database().session.query(models.Scan).first()
         services = [
             {'ID': '0099i5n1y3gycuekvksyqyxav',
              'CreatedAt': '2021-12-27T13:37:02.795789947Z',
-             'Spec': {'Labels': {'ostorlab.universe': scan.id}}},
+             'Spec': {'Labels': {'ostorlab.universe': str(scan.id)}}},
             {'ID': '0099i5n1y3gycuekvksyqyxav',
              'CreatedAt': '2021-12-27T13:37:02.795789947Z',
-             'Spec': {'Labels': {'ostorlab.universe': 9999}}}
+             'Spec': {'Labels': {'ostorlab.universe': '9999'}}}
         ]
 
-        return [services_model.Service(attrs=service) for service in services]
+        return [services_model.Service(attrs=service) for service in services
+                if filters['label'] == f'ostorlab.universe={service["Spec"]["Labels"]["ostorlab.universe"]}']
 
     mocker.patch('docker.DockerClient.services',
                  return_value=services_model.ServiceCollection())
@@ -95,19 +98,20 @@ def testRuntimeScanStop_whenScanIdIsInvalid_DoesNotRemoveAnyService(mocker, db_e
     Does not remove any service.
     """
 
-    def docker_services():
-        """Method for mocking the services list response."""
+    def docker_services(filters):
+        """Method for mocking the services list response, filtered by the universe label."""
 
         services = [
             {'ID': '0099i5n1y3gycuekvksyqyxav',
              'CreatedAt': '2021-12-27T13:37:02.795789947Z',
-             'Spec': {'Labels': {'ostorlab.universe': '1'}}},
+             'Spec': {'Labels': {'ostorlab.universe': '9997'}}},
             {'ID': '0099i5n1y3gycuekvksyqyxav',
              'CreatedAt': '2021-12-27T13:37:02.795789947Z',
-             'Spec': {'Labels': {'ostorlab.universe': '2'}}}
+             'Spec': {'Labels': {'ostorlab.universe': '9998'}}}
         ]
 
-        return [services_model.Service(attrs=service) for service in services]
+        return [services_model.Service(attrs=service) for service in services
+                if filters['label'] == f'ostorlab.universe={service["Spec"]["Labels"]["ostorlab.universe"]}']
 
     mocker.patch('docker.DockerClient.services',
                  return_value=services_model.ServiceCollection())
@@ -126,14 +130,14 @@ def testRuntimeScanStop_whenScanIdIsInvalid_DoesNotRemoveAnyService(mocker, db_e
 
     docker_service_remove.assert_not_called()
 
-def testRuntimeScanList_whenScansArePresent_showsScans(mocker, db_engine_path):
+def testRuntimeScanList_whenScansArePresent_showsScans(mocker, db_engine_path, local_runtime_instance, docker_client):
     """Unittest for the scan list method when there are local scans available.
     Gets the docker services and checks for those with ostorlab.universe
     as one of the labels.
     Shows the list of scans.
     """
-    def docker_services():
-        """Method for mocking the scan list response."""
+    def docker_services(filters):
+        """Method for mocking the scan list response, filtered by the universe label presence."""
         services = [
             {'ID': '0099i5n1y3gycuekvksyqyxav',
              'CreatedAt': '2021-12-27T13:37:02.795789947Z',
@@ -143,13 +147,237 @@ def testRuntimeScanList_whenScansArePresent_showsScans(mocker, db_engine_path):
              'Spec': {'Labels': {'ostorlab.mq': ''}}}
         ]
 
-        return [services_model.Service(attrs=service) for service in services]
+        return [services_model.Service(attrs=service) for service in services
+                if filters['label'] in service['Spec']['Labels']]
 
     mocker.patch.object(ostorlab.runtimes.local.models.models, 'ENGINE_URL', db_engine_path)
-    mocker.patch('ostorlab.runtimes.local.LocalRuntime.__init__', return_value=None)
-    mocker.patch('docker.DockerClient.services', return_value=services_model.ServiceCollection())
-    mocker.patch('docker.DockerClient.services.list', side_effect=docker_services)
+    docker_client.services.list.side_effect = docker_services
 
-    scans = local_runtime.LocalRuntime().list()
+    scans = local_runtime_instance.list()
 
     assert len(scans) == 0
+
+
+def testRemoveComponents_whenARemovalFails_removesTheOtherComponents(mocker):
+    """Unittest for the concurrent removal of scan components.
+    A failing removal should not prevent the removal of the other components and is not reported as removed.
+    """
+    # pylint: disable=protected-access
+    removable_service = mocker.MagicMock()
+    failing_service = mocker.MagicMock()
+    failing_service.remove.side_effect = docker.errors.APIError('Service in use.')
+
+    removed = local_runtime._remove_components([removable_service, failing_service])
+
+    assert removed == [removable_service]
+    removable_service.remove.assert_called_once()
+    failing_service.remove.assert_called_once()
+
+
+def testAreAgentsReady_whenAnAgentIsUnhealthy_returnsFalse(mocker, local_runtime_instance):
+    """Unittest for the agents readiness check, agent services are probed concurrently.
+    An unhealthy long-running agent makes the check fail, while run-once agents are not probed.
+    """
+    # pylint: disable=protected-access
+    def agent_service(name, restart_condition):
+        return services_model.Service(attrs={
+            'ID': name,
+            'Spec': {'Name': name, 'TaskTemplate': {'RestartPolicy': {'Condition': restart_condition}}}
+        })
+
+    services = [agent_service('agent_healthy', 'any'), agent_service('agent_unhealthy', 'any'),
+                agent_service('agent_run_once', 'none')]
+    list_agent_services = mocker.patch.object(local_runtime_instance, '_list_agent_services',
+                                              return_value=iter(services))
+    is_service_running = mocker.patch.object(local_runtime_instance, '_is_service_running',
+                                             side_effect=lambda service: service.name == 'agent_healthy')
+    mocker.patch.object(local_runtime_instance, '_wait_for_services_running', return_value=False)
+    mocker.patch.object(local_runtime.LocalRuntime._are_services_healthy.retry, 'stop',
+                        tenacity.stop_after_attempt(2))
+    mocker.patch.object(local_runtime.LocalRuntime._are_services_healthy.retry, 'wait', tenacity.wait_none())
+
+    is_ready = local_runtime_instance._are_agents_ready(fail_fast=False)
+
+    assert is_ready is False
+    assert 'agent_run_once' not in [call.args[0].name for call in is_service_running.call_args_list]
+    # services are listed once, only the health check is retried.
+    list_agent_services.assert_called_once()
+    assert is_service_running.call_count == 4
+
+
+def testAreServicesHealthy_whenFailFast_returnsWithoutProbesLeftRunning(mocker, local_runtime_instance):
+    """Unittest for the fail fast services health check.
+    The check returns on the first unhealthy service and no probe keeps running after it returns.
+    """
+    # pylint: disable=protected-access
+    finished_probes = []
+
+    def is_service_running(service):
+        time.sleep(0.05)
+        finished_probes.append(service.name)
+        return service.name != 'agent_0'
+
+    services = [services_model.Service(attrs={'ID': f'agent_{i}', 'Spec': {'Name': f'agent_{i}'}}) for i in range(3)]
+    mocker.patch.object(local_runtime_instance, '_is_service_running', side_effect=is_service_running)
+
+    # Calling the wrapped method directly skips the retries.
+    is_healthy = local_runtime.LocalRuntime._are_services_healthy.__wrapped__(local_runtime_instance, services)
+    probes_on_return = list(finished_probes)
+    time.sleep(0.1)
+
+    assert is_healthy is False
+    assert finished_probes == probes_on_return
+
+
+def testIsServiceRunning_whenTasksAreStarting_returnsFalse(mocker, local_runtime_instance):
+    """Unittest for the service running check.
+    Only tasks desired and actually running count toward the expected replicas.
+    """
+    # pylint: disable=protected-access
+    service = mocker.MagicMock()
+    service.tasks.return_value = [{'Status': {'State': 'running'}}, {'Status': {'State': 'starting'}}]
+
+    is_healthy = local_runtime_instance._is_service_running(service, replicas=2)
+
+    assert is_healthy is False
+    service.tasks.assert_called_once_with(filters={'desired-state': 'running'})
+
+
+def testScaleService_always_scalesRefreshedService(local_runtime_instance, docker_client):
+    """Unittest for the service scaling workaround.
+    The service should be refreshed by its id and then scaled, without listing all the services.
+    """
+    # pylint: disable=protected-access
+    service = services_model.Service(attrs={'ID': 'agent_1', 'Spec': {'Name': 'agent_1'}})
+
+    local_runtime_instance._scale_service(service, 3)
+
+    docker_client.services.get.assert_called_once_with('agent_1')
+    docker_client.services.get.return_value.scale.assert_called_once_with(3)
+    docker_client.services.list.assert_not_called()
+
+
+def testStartAgents_whenAnAgentIsNotInstalled_raisesBeforeStartingAnyAgent(mocker, local_runtime_instance):
+    """Unittest for the agents images check.
+    No agent is started when one of the agents is not installed.
+    """
+    # pylint: disable=protected-access
+    mocker.patch('ostorlab.runtimes.local.runtime._has_container_image',
+                 side_effect=lambda agent: agent.key != 'agent/ostorlab/not_installed')
+    start_agent_mock = mocker.patch.object(local_runtime_instance, '_start_agent')
+    agent_group_definition = definitions.AgentGroupDefinition(agents=[
+        definitions.AgentSettings(key='agent/ostorlab/nmap'),
+        definitions.AgentSettings(key='agent/ostorlab/not_installed'),
+    ])
+
+    with pytest.raises(local_runtime.AgentNotInstalled):
+        local_runtime_instance._start_agents(agent_group_definition)
+
+    start_agent_mock.assert_not_called()
+
+
+def testUpdateScanProgress_always_updatesScanInDatabase(mocker, db_engine_path, local_runtime_instance):
+    """Unittest for the scan progress update, the scan progress is updated in the database."""
+    # pylint: disable=protected-access
+    mocker.patch.object(models, 'ENGINE_URL', db_engine_path)
+    models.Database().create_db_tables()
+    local_runtime_instance._scan_db = models.Scan.create(title='test', asset='Android')
+
+    local_runtime_instance._update_scan_progress('IN_PROGRESS')
+
+    scan = models.Database().session.query(models.Scan).get(local_runtime_instance._scan_db.id)
+    assert scan.progress == models.ScanProgress.IN_PROGRESS
+
+
+def testRuntimeScanList_whenServiceScanIsNotInDatabase_showsScansAndWarns(mocker, db_engine_path,
+                                                                         local_runtime_instance, docker_client):
+    """Unittest for the scan list method when a running scan is missing from the database.
+    Lists the scans of the database and warns about the scan only known to docker.
+    """
+    mocker.patch.object(models, 'ENGINE_URL', db_engine_path)
+    models.Database().create_db_tables()
+    create_scan_db = models.Scan.create(title='test', asset='Android')
+    services = [
+        services_model.Service(attrs={'ID': '1', 'Spec': {'Labels': {'ostorlab.universe': str(create_scan_db.id)}}}),
+        services_model.Service(attrs={'ID': '2', 'Spec': {'Labels': {'ostorlab.universe': '9999'}}}),
+        services_model.Service(attrs={'ID': '3', 'Spec': {'Labels': {'ostorlab.universe': '9999'}}}),
+    ]
+    docker_client.services.list.return_value = services
+    console_warning = mocker.patch.object(local_runtime.console, 'warning')
+
+    scans = local_runtime_instance.list()
+
+    assert [scan.id for scan in scans] == [create_scan_db.id]
+    assert scans[0].progress == 'not_started'
+    assert [c.args[0] for c in console_warning.call_args_list].count('Scan 9999 has not traced in DB.') == 1
+
+
+def testWaitForServicesRunning_whenServiceContainerStarts_returnsTrueWithoutPolling(mocker, local_runtime_instance,
+                                                                                   docker_client):
+    """Unittest for the event based agents readiness wait.
+    A service is re-checked only when one of its containers emits an event, and the wait ends once all are running.
+    """
+    # pylint: disable=protected-access
+    def agent_service(name):
+        return services_model.Service(attrs={'ID': name, 'Spec': {'Name': name}})
+
+    events = mocker.MagicMock()
+    events.__iter__.return_value = iter([
+        {'Type': 'container', 'Action': 'start', 'Actor': {'Attributes': {'com.docker.swarm.service.name': 'mq_1'}}},
+        {'Type': 'container', 'Action': 'start',
+         'Actor': {'Attributes': {'com.docker.swarm.service.name': 'agent_starting'}}},
+    ])
+    docker_client.events.return_value = events
+    # agent_starting is not running yet when first checked, then running after its container start event.
+    is_service_running = mocker.patch.object(local_runtime_instance, '_is_service_running',
+                                             side_effect=[True, False, True])
+    mocker.patch.object(local_runtime_instance, '_has_service_failed', return_value=False)
+
+    is_running = local_runtime_instance._wait_for_services_running(
+        [agent_service('agent_running'), agent_service('agent_starting')], timeout=60)
+
+    assert is_running is True
+    assert [call.args[0].name for call in is_service_running.call_args_list] == [
+        'agent_running', 'agent_starting', 'agent_starting']
+    events.close.assert_called_once()
+
+
+def testWaitForServicesRunning_whenServiceContainerDies_returnsFalseBeforeTimeout(mocker, local_runtime_instance,
+                                                                                 docker_client):
+    """Unittest for the event based agents readiness wait with fail fast.
+    The wait stops as soon as a container of a pending service dies, without waiting for the timeout.
+    """
+    # pylint: disable=protected-access
+    events = mocker.MagicMock()
+    events.__iter__.return_value = iter([
+        {'Type': 'container', 'Action': 'die', 'Actor': {'Attributes': {'com.docker.swarm.service.name': 'agent_1'}}},
+        {'Type': 'container', 'Action': 'start', 'Actor': {'Attributes': {'com.docker.swarm.service.name': 'agent_1'}}},
+    ])
+    docker_client.events.return_value = events
+    is_service_running = mocker.patch.object(local_runtime_instance, '_is_service_running', return_value=False)
+    mocker.patch.object(local_runtime_instance, '_has_service_failed', return_value=False)
+    service = services_model.Service(attrs={'ID': 'agent_1', 'Spec': {'Name': 'agent_1'}})
+
+    is_running = local_runtime_instance._wait_for_services_running([service], timeout=60)
+
+    assert is_running is False
+    is_service_running.assert_called_once()
+    events.close.assert_called_once()
+
+
+def testWaitForServicesRunning_whenNoServices_returnsTrueWithoutOpeningEvents(local_runtime_instance, docker_client):
+    """Unittest for the event based agents readiness wait without agent services.
+    The wait returns right away, without opening the docker events stream.
+    """
+    # pylint: disable=protected-access
+    assert local_runtime_instance._wait_for_services_running([], timeout=60) is True
+    docker_client.events.assert_not_called()
+
+
+def testHasServiceFailed_whenATaskFailed_returnsTrue(mocker, local_runtime_instance):
+    """Unittest for the terminal task state check of a service."""
+    # pylint: disable=protected-access
+    service = mocker.MagicMock()
+    service.tasks.return_value = [{'Status': {'State': 'starting'}}, {'Status': {'State': 'failed'}}]
+
+    assert local_runtime_instance._has_service_failed(service) is True